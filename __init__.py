@@ -9,83 +9,394 @@ bl_info = {
 }
 
 import bpy # type: ignore
+from bpy.app.handlers import persistent # type: ignore
+import numpy as np
+import ast
 import os
-
+from functools import lru_cache
+
+# EAN-13 guard patterns
+EAN13_LEFT_GUARD = "101"
+EAN13_CENTER_GUARD = "01010"
+EAN13_RIGHT_GUARD = "101"
+
+# EAN-13 encoding tables
+EAN13_LEFT_A = ("0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011")
+EAN13_LEFT_B = ("0100111", "0110011", "0011011", "0100001", "0011101", "0111001", "0000101", "0010001", "0001001", "0010111")
+EAN13_RIGHT_C = ("1110010", "1100110", "1101100", "1000010", "1011100", "1001110", "1010000", "1000100", "1001000", "1110100")
+
+# Parity of the left side, selected by the first digit (parity digit)
+EAN13_PARITY_PATTERNS = (
+    "AAAAAA", "AABABB", "AABBAB", "AABBBA", "ABBAAB",
+    "ABBBAA", "ABABAB", "ABABBA", "ABBABA", "ABBAAA"
+)
+
+def _code_bits(codes):
+    """Converts binary code strings into a uint8 array of bits, one row per code."""
+    return np.array([[int(bit) for bit in code] for code in codes], dtype=np.uint8)
+
+# Bit-level lookup tables: parity (10, 6) with A=0 and B=1, left side (2, 10, 7), right side (10, 7)
+EAN13_PARITY_BITS = np.array([[0 if parity == "A" else 1 for parity in pattern] for pattern in EAN13_PARITY_PATTERNS], dtype=np.uint8)
+EAN13_LEFT_BITS = np.stack([_code_bits(EAN13_LEFT_A), _code_bits(EAN13_LEFT_B)])
+EAN13_RIGHT_BITS = _code_bits(EAN13_RIGHT_C)
+EAN13_LEFT_GUARD_BITS, EAN13_CENTER_GUARD_BITS, EAN13_RIGHT_GUARD_BITS = (
+    _code_bits([guard])[0] for guard in (EAN13_LEFT_GUARD, EAN13_CENTER_GUARD, EAN13_RIGHT_GUARD)
+)
+
+# Checksum weights of the first 12 digits (odd positions × 1, even positions × 3)
+EAN13_CHECKSUM_WEIGHTS = np.array([1, 3] * 6)
+
+def _ean13_digits(digital_sequence):
+    """Converts an ASCII numeric string into an array of digit values."""
+    return np.frombuffer(digital_sequence.encode("ascii"), dtype=np.uint8) - ord("0")
+
+def _ean13_checksum(digits):
+    """Modulo-10 checksum of the first 12 digit values."""
+    total = int((digits[:12] * EAN13_CHECKSUM_WEIGHTS).sum())
+    return (10 - total % 10) % 10
+
+def _ean13_bits(digits):
+    """Encodes 13 digit values into the 95 EAN-13 modules as a uint8 array of bits."""
+    return np.concatenate([
+        EAN13_LEFT_GUARD_BITS,
+        EAN13_LEFT_BITS[EAN13_PARITY_BITS[digits[0]], digits[1:7]].ravel(),  # Digits 2-7, parity per position
+        EAN13_CENTER_GUARD_BITS,
+        EAN13_RIGHT_BITS[digits[7:]].ravel(),  # Digits 8-13
+        EAN13_RIGHT_GUARD_BITS,
+    ])
+
+def is_ean13_sequence(digital_sequence):
+    """Check that a sequence is 12 or 13 ASCII digits, as encode_ean13 expects."""
+    return len(digital_sequence) in (12, 13) and digital_sequence.isascii() and digital_sequence.isdigit()
+
+@lru_cache(maxsize=128)
 def encode_ean13(digital_sequence):
     """
     Encodes a 13-digit sequence into binary for EAN-13 barcodes.
     """
     # Validate input (must be 12 or 13 digits)
-    if not (len(digital_sequence) == 12 or len(digital_sequence) == 13) or not digital_sequence.isdigit():
+    if not is_ean13_sequence(digital_sequence):
         return "Invalid input: Must be 12 or 13 digits"
 
-    # If 12 digits are provided, calculate the checksum
-    if len(digital_sequence) == 12:
-        checksum = calculate_ean13_checksum(digital_sequence)
-        digital_sequence += str(checksum)
-
-    # Guard patterns
-    left_guard = "101"
-    center_guard = "01010"
-    right_guard = "101"
-
-    # Encoding tables
-    left_A = ["0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011"]
-    left_B = ["0100111", "0110011", "0011011", "0100001", "0011101", "0111001", "0000101", "0010001", "0001001", "0010111"]
-    right_C = ["1110010", "1100110", "1101100", "1000010", "1011100", "1001110", "1010000", "1000100", "1001000", "1110100"]
-
-    # Determine parity for left side based on the first digit (parity digit)
-    parity_patterns = [
-        "AAAAAA", "AABABB", "AABBAB", "AABBBA", "ABBAAB",
-        "ABBBAA", "ABABAB", "ABABBA", "ABBABA", "ABBAAA"
-    ]
-    parity = parity_patterns[int(digital_sequence[0])]
-
-    # Encode the left side (digits 2-7)
-    left_side = ""
-    for i, digit in enumerate(digital_sequence[1:7]):
-        if parity[i] == "A":
-            left_side += left_A[int(digit)]
-        else:
-            left_side += left_B[int(digit)]
-
-    # Encode the right side (digits 8-13)
-    right_side = ""
-    for digit in digital_sequence[7:]:
-        right_side += right_C[int(digit)]
+    # Parse the digits once; if 12 digits are provided, append the checksum
+    digits = _ean13_digits(digital_sequence)
+    if len(digits) == 12:
+        digits = np.append(digits, _ean13_checksum(digits))
 
-    # Combine everything
-    binary_code = left_guard + left_side + center_guard + right_side + right_guard
-    return binary_code
+    # Encode by table lookup and turn the bits back into "0"/"1" characters
+    return (_ean13_bits(digits) + ord("0")).tobytes().decode("ascii")
 
+@lru_cache(maxsize=128)
 def calculate_ean13_checksum(digital_sequence):
     """
     Calculates the checksum (13th digit) for an EAN-13 barcode.
     """
     # Check input length
-    if len(digital_sequence) != 12 or not digital_sequence.isdigit():
+    if len(digital_sequence) != 12 or not (digital_sequence.isascii() and digital_sequence.isdigit()):
         raise ValueError("Input must be a 12-digit numeric string to calculate checksum.")
 
-    # Modulo-10 checksum calculation
-    total = 0
-    for i, digit in enumerate(digital_sequence):
-        multiplier = 3 if i % 2 else 1  # Odd positions × 1, even positions × 3
-        total += int(digit) * multiplier
-    remainder = total % 10
-    checksum = (10 - remainder) if remainder != 0 else 0
-    return checksum
+    return _ean13_checksum(_ean13_digits(digital_sequence))
+
+# Corners of a unit cube centered at the origin (bits 0/1/2 of the index select +X/+Y/+Z)
+UNIT_CUBE_CORNERS = np.array(
+    [[(i & 1) - 0.5, ((i >> 1) & 1) - 0.5, ((i >> 2) & 1) - 0.5] for i in range(8)],
+    dtype=np.float32,
+)
+
+# The six outward-facing quads of the unit cube, as indices into UNIT_CUBE_CORNERS
+UNIT_CUBE_FACES = np.array(
+    [[0, 2, 3, 1], [4, 5, 7, 6], [0, 1, 5, 4], [2, 6, 7, 3], [2, 0, 4, 6], [1, 3, 7, 5]],
+    dtype=np.int32,
+)
+
+def build_box_mesh(name, centers, sizes, material_indices=None):
+    """
+    Builds a single mesh holding one axis-aligned box per row of centers/sizes.
+    A single row of sizes is shared by every box.
+    """
+    centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+    sizes = np.asarray(sizes, dtype=np.float32).reshape(-1, 3)
+    box_count = len(centers)
+
+    # Scale and offset the unit cube corners for every box at once
+    vertices = centers[:, None, :] + UNIT_CUBE_CORNERS[None, :, :] * sizes[:, None, :]
+
+    # Offset the cube faces of every box by the index of its first vertex
+    box_offsets = 8 * np.arange(box_count, dtype=np.int32)
+    loop_vertices = UNIT_CUBE_FACES[None, :, :] + box_offsets[:, None, None]
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(8 * box_count)
+    mesh.loops.add(24 * box_count)
+    mesh.polygons.add(6 * box_count)
+    mesh.vertices.foreach_set("co", vertices.ravel())
+    mesh.loops.foreach_set("vertex_index", loop_vertices.ravel())
+
+    # Every face is a quad; face sizes follow from the loop start offsets
+    mesh.polygons.foreach_set("loop_start", np.arange(0, 24 * box_count, 4, dtype=np.int32))
+
+    # Material slot per box, shared by its six faces
+    if material_indices is not None:
+        face_materials = np.repeat(np.asarray(material_indices, dtype=np.int32), 6)
+        mesh.polygons.foreach_set("material_index", face_materials)
+
+    mesh.update()
+    return mesh
+
+def build_cylinder_mesh(name, radius, depth, segments=64):
+    """
+    Builds a closed cylinder mesh around the Z axis, centered on the origin.
+    """
+    # Bottom ring followed by top ring
+    angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    ring = np.column_stack([radius * np.cos(angles), radius * np.sin(angles)])
+    vertices = np.concatenate([
+        np.column_stack([ring, np.full(segments, -depth / 2)]),
+        np.column_stack([ring, np.full(segments, depth / 2)]),
+    ])
+
+    # Side quads between the rings, plus the two caps, all wound outward
+    current = np.arange(segments)
+    following = (current + 1) % segments
+    sides = np.column_stack([current, following, following + segments, current + segments])
+    faces = sides.tolist() + [list(range(segments - 1, -1, -1)), list(range(segments, 2 * segments))]
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(vertices.tolist(), [], faces)
+    mesh.update()
+    return mesh
+
+def get_material(name, color):
+    """Return the named material, creating it with the given color if it does not exist yet."""
+    material = bpy.data.materials.get(name)
+    if material is None:
+        material = bpy.data.materials.new(name=name)
+        material.diffuse_color = color
+    return material
+
+# Marker materials by name, with their viewport colors
+MARKER_MATERIALS = {
+    "LumosX_Black": (0, 0, 0, 1),
+    "LumosX_White": (1, 1, 1, 1),
+}
+
+def ensure_materials():
+    """Create any missing marker materials and return all of them by name."""
+    return {name: get_material(name, color) for name, color in MARKER_MATERIALS.items()}
+
+@persistent
+def ensure_materials_on_load(_):
+    """Create the marker materials in every file that gets loaded."""
+    ensure_materials()
+
+def find_runs(bits):
+    """
+    Finds the runs of 1s along each row of a 2D 0/1 array.
+    Returns (rows, starts, lengths) arrays with one entry per run, in row-major order.
+    """
+    bits = np.asarray(bits, dtype=np.int8).reshape(len(bits), -1)
+    edges = np.diff(np.pad(bits, ((0, 0), (1, 1))), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends - starts
+
+def merge_grid_blocks(grid):
+    """
+    Splits a grid state into rectangular blocks of cells.
+    Horizontal runs of merged cells become one block each, the remaining merged
+    cells are joined vertically, and every unmerged cell is a block of its own.
+    Returns (rows, cols, widths, heights) arrays in cell units.
+    """
+    merged = np.asarray(grid) == 1
+
+    # Horizontal merges: runs of two or more merged cells in a row
+    h_rows, h_cols, h_widths = find_runs(merged)
+    is_long = h_widths > 1
+
+    # Vertical merges: runs of the leftover single merged cells down each column
+    singles = np.zeros_like(merged)
+    singles[h_rows[~is_long], h_cols[~is_long]] = True
+    v_cols, v_rows, v_heights = find_runs(singles.T)
+
+    # Unmerged cells
+    u_rows, u_cols = np.nonzero(~merged)
+
+    rows = np.concatenate([h_rows[is_long], v_rows, u_rows])
+    cols = np.concatenate([h_cols[is_long], v_cols, u_cols])
+    widths = np.concatenate([h_widths[is_long], np.ones_like(v_rows), np.ones_like(u_rows)])
+    heights = np.concatenate([np.ones_like(h_rows[is_long]), v_heights, np.ones_like(u_rows)])
+    return rows, cols, widths, heights
+
+# Grids hold at most 10x10 cells, packed row-major into a 128-bit mask of 32 hex digits
+GRID_MASK_DIGITS = 32
+
+def read_mask(value):
+    """Decode a hex-packed cell mask into an int."""
+    return int(value, 16) if value else 0
+
+def write_mask(mask):
+    """Encode a cell mask as a fixed-width hex string."""
+    return format(mask, f"0{GRID_MASK_DIGITS}x")
+
+def mask_cells(mask, cols):
+    """List the (row, col) coordinates of the cells set in a mask, in row-major order."""
+    cells = []
+    while mask:
+        low_bit = mask & -mask
+        cells.append(divmod(low_bit.bit_length() - 1, cols))
+        mask ^= low_bit
+    return cells
+
+class GridStateManager:
+    """
+    Holds the parsed grid state of one LumosX property group.
+    Grid changes are written through to the string properties so they take part in undo,
+    while the cell selection only lives here and is written out when the file is saved.
+    """
+    # Managers keyed by property group pointer
+    _instances = {}
+
+    def __init__(self, props):
+        self.props = props
+        self.rows = props.grid_rows
+        self.cols = props.grid_columns
+        self.grid_mask = read_mask(props.grid_state)
+        self.selected_mask = read_mask(props.selected_cells)
+        self._grid = None
+        self._stored = self._stored_state(props)
+
+    @staticmethod
+    def _stored_state(props):
+        """The stored grid shape and mask, as last read or written by a manager."""
+        return (props.grid_rows, props.grid_columns, props.grid_state)
+
+    def matches(self, props):
+        """Check that the properties still hold the state this manager last read or wrote."""
+        return self._stored == self._stored_state(props)
+
+    @classmethod
+    def of(cls, props):
+        """Return the manager of a property group, reading the stored state on first use or after it changed."""
+        key = props.as_pointer()
+        manager = cls._instances.get(key)
+        if manager is None or not manager.matches(props):
+            manager = cls._instances[key] = cls(props)
+        manager.props = props
+        return manager
+
+    @classmethod
+    def clear(cls):
+        """Drop all managers so the state is read again from the properties."""
+        cls._instances.clear()
+
+    @classmethod
+    def discard_stale(cls):
+        """Drop the managers of deleted scenes and of scenes whose stored state changed underneath them."""
+        live = {}
+        for scene in bpy.data.scenes:
+            key = scene.lumosx_props.as_pointer()
+            manager = cls._instances.get(key)
+            if manager is not None and manager.matches(scene.lumosx_props):
+                manager.props = scene.lumosx_props
+                live[key] = manager
+        cls._instances.clear()
+        cls._instances.update(live)
+
+    @classmethod
+    def save_all(cls):
+        """Write the state of every live manager back to its properties."""
+        cls.discard_stale()
+        for manager in cls._instances.values():
+            manager.save()
+
+    def save(self):
+        """Serialize the state into the string properties."""
+        self.props.grid_rows = self.rows
+        self.props.grid_columns = self.cols
+        self.props.grid_state = write_mask(self.grid_mask)
+        self.props.selected_cells = write_mask(self.selected_mask)
+        self._stored = self._stored_state(self.props)
+
+    def get(self):
+        """Return the grid state as a 2D NumPy array, decoded once per change."""
+        if self._grid is None:
+            mask_bytes = np.frombuffer(self.grid_mask.to_bytes(GRID_MASK_DIGITS // 2, "little"), dtype=np.uint8)
+            self._grid = np.unpackbits(mask_bytes, bitorder="little")[:self.rows * self.cols].reshape(self.rows, self.cols)
+        return self._grid
+
+    def set(self, grid_mask):
+        """Replace the grid state mask, clear the selection and write both through."""
+        self.grid_mask = grid_mask
+        self.selected_mask = 0
+        self._grid = None
+        self.save()
+
+    def reset(self, rows, cols):
+        """Start over with an unmerged grid of the given size."""
+        self.rows, self.cols = rows, cols
+        self.set(0)
+
+    def toggle(self, row, col):
+        """Toggle the selection of one cell."""
+        self.selected_mask ^= 1 << (row * self.cols + col)
+
+    def merge(self):
+        """Mark the selected cells as merged."""
+        self.set(self.grid_mask | self.selected_mask)
+
+    def split(self):
+        """Unmark the selected cells as merged."""
+        self.set(self.grid_mask & ~self.selected_mask)
 
 def initialize_grid_state(props):
-    """Initialize or reset the grid state as a 2D list."""
-    rows = props.number_of_rows
-    cols = props.number_of_columns
-    grid_state = [[0 for _ in range(cols)] for _ in range(rows)]
-    props.grid_state = str(grid_state)  # Store as a serialized string
+    """Initialize or reset the grid state to an unmerged grid of the current size."""
+    GridStateManager.of(props).reset(props.number_of_rows, props.number_of_columns)
+
+def migrate_legacy_grid_state(props):
+    """Convert grid and selection states saved as list reprs by older versions into cell masks."""
+    if props.grid_state.startswith("["):
+        # Parse with ast.literal_eval rather than eval: literals only, no code execution
+        grid = ast.literal_eval(props.grid_state)
+        props.grid_rows = len(grid)
+        props.grid_columns = len(grid[0]) if grid else 0
+        cols = props.grid_columns
+        props.grid_state = write_mask(sum(1 << (r * cols + c) for r, row in enumerate(grid) for c, cell in enumerate(row) if cell == 1))
+
+    if props.selected_cells.startswith("["):
+        cols = props.grid_columns
+        props.selected_cells = write_mask(sum(1 << (r * cols + c) for r, c in set(ast.literal_eval(props.selected_cells))))
+
+@persistent
+def prepare_grid_states_on_load(_):
+    """Convert legacy grid states and initialize missing ones in every file that gets loaded."""
+    GridStateManager.clear()
+    for scene in bpy.data.scenes:
+        props = scene.lumosx_props
+        migrate_legacy_grid_state(props)
+        if not props.grid_state:
+            initialize_grid_state(props)
+
+@persistent
+def save_grid_states_on_save(_):
+    """Serialize the grid states right before the file is written."""
+    GridStateManager.save_all()
+
+@persistent
+def reload_grid_states_on_undo(_):
+    """Re-read the grid states that undo or redo actually restored, keeping the others' selection."""
+    GridStateManager.discard_stale()
+
+def resize_grid_state(props, context):
+    """Reset the grid state when the number of rows or columns changes."""
+    grid = GridStateManager.of(props)
+    if (grid.rows, grid.cols) != (props.number_of_rows, props.number_of_columns):
+        initialize_grid_state(props)
 
 
 class PreviewGridOperator(bpy.types.Operator):
     bl_idname = "object.preview_grid_operator"
     bl_label = "Preview Grid"
+    bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
         props = context.scene.lumosx_props
@@ -94,9 +405,8 @@ class PreviewGridOperator(bpy.types.Operator):
         if "Grid_Preview" in bpy.data.collections:
             bpy.data.collections.remove(bpy.data.collections["Grid_Preview"])
 
-        # Create a new preview collection
+        # Create a new preview collection; it is linked to the scene once it is filled
         preview_collection = bpy.data.collections.new("Grid_Preview")
-        bpy.context.scene.collection.children.link(preview_collection)
 
         # Grid properties
         columns = props.number_of_columns
@@ -113,25 +423,20 @@ class PreviewGridOperator(bpy.types.Operator):
         start_x = -width / 2
         start_y = -height / 2
 
-        # Loop through rows and columns to create grid cells
-        for row in range(rows):
-            for col in range(columns):
-                x_pos = start_x + (col * cell_width) + (cell_width / 2)
-                y_pos = start_y + (row * cell_height) + (cell_height / 2)
+        # Compute all cell centers at once, in row-major order
+        xs, ys = np.meshgrid(
+            start_x + (np.arange(columns) + 0.5) * cell_width,
+            start_y + (np.arange(rows) + 0.5) * cell_height,
+        )
+        centers = np.stack([xs, ys, np.full_like(xs, thickness / 2)], axis=-1).reshape(-1, 3)
 
-                # Add a plane for each cell
-                bpy.ops.mesh.primitive_cube_add(
-                    size=1,
-                    location=(x_pos, y_pos, thickness / 2),
-                )
-                cell = bpy.context.object
-                cell.dimensions = (cell_width, cell_height, thickness)
+        # Build every cell into one mesh and link it straight into the preview collection
+        preview_mesh = build_box_mesh("Grid_Preview", centers, (cell_width, cell_height, thickness))
+        preview_collection.objects.link(bpy.data.objects.new("Grid_Preview", preview_mesh))
 
-                # Link to the preview collection
-                preview_collection.objects.link(cell)
-
-                # Unlink from the main collection
-                bpy.context.scene.collection.objects.unlink(cell)
+        # Add the finished collection to the scene and evaluate it once
+        bpy.context.scene.collection.children.link(preview_collection)
+        context.view_layer.update()
 
         self.report({'INFO'}, "Grid Preview Generated")
         return {'FINISHED'}
@@ -139,6 +444,7 @@ class PreviewGridOperator(bpy.types.Operator):
 class ClearPreviewOperator(bpy.types.Operator):
     bl_idname = "object.clear_preview_operator"
     bl_label = "Clear Preview"
+    bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
         # Remove the Grid_Preview collection
@@ -165,19 +471,31 @@ class LumosXProperties(bpy.types.PropertyGroup):
     # Grid-specific properties
     grid_width: bpy.props.FloatProperty(name="Width", default=10.0, min=1.0, max=50.0) # type: ignore
     grid_height: bpy.props.FloatProperty(name="Height", default=10.0, min=1.0, max=50.0) # type: ignore
-    number_of_columns: bpy.props.IntProperty(name="Columns", default=3, min=1, max=10) # type: ignore
-    number_of_rows: bpy.props.IntProperty(name="Rows", default=3, min=1, max=10) # type: ignore
+    number_of_columns: bpy.props.IntProperty(name="Columns", default=3, min=1, max=10, update=resize_grid_state) # type: ignore
+    number_of_rows: bpy.props.IntProperty(name="Rows", default=3, min=1, max=10, update=resize_grid_state) # type: ignore
 
     # Grid state for merging (a 2D list to track merged cells)
     grid_state: bpy.props.StringProperty(
         name="Grid State",
         default="",  # Initialize as an empty string
-        description="Stores the merge state of the grid as a serialized 2D list."
+        description="Stores the merge state of the grid as a hex-packed cell mask."
+    ) # type: ignore
+    grid_rows: bpy.props.IntProperty(
+        name="Grid State Rows",
+        default=0,
+        options={'HIDDEN'},
+        description="Number of rows the grid state was initialized with."
+    ) # type: ignore
+    grid_columns: bpy.props.IntProperty(
+        name="Grid State Columns",
+        default=0,
+        options={'HIDDEN'},
+        description="Number of columns the grid state was initialized with."
     ) # type: ignore
     selected_cells: bpy.props.StringProperty(
         name="Selected Cells",
-        default="[]",  # Initialize as an empty list
-        description="Stores the coordinates of selected cells as a list of tuples."
+        default="",  # Initialize as an empty mask
+        description="Stores the selected cells as a hex-packed cell mask."
     ) # type: ignore
 
 # Barcode-specific properties
@@ -227,6 +545,7 @@ class LumosXProperties(bpy.types.PropertyGroup):
 class TranslateSequenceOperator(bpy.types.Operator):
     bl_idname = "object.translate_sequence"
     bl_label = "Translate Sequence"
+    bl_options = {'INTERNAL'}
 
     def execute(self, context):
         props = context.scene.lumosx_props
@@ -243,6 +562,7 @@ class TranslateSequenceOperator(bpy.types.Operator):
 class ClearSequenceOperator(bpy.types.Operator):
     bl_idname = "object.clear_sequence"
     bl_label = "Clear Sequence"
+    bl_options = {'INTERNAL'}
 
     def execute(self, context):
         props = context.scene.lumosx_props
@@ -257,6 +577,7 @@ class ClearSequenceOperator(bpy.types.Operator):
 class AddMarkerOperator(bpy.types.Operator):
     bl_idname = "object.add_marker_operator"
     bl_label = "Add Marker"
+    bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
         props = context.scene.lumosx_props
@@ -266,6 +587,9 @@ class AddMarkerOperator(bpy.types.Operator):
             if not props.binary_code:
                 self.report({'ERROR'}, "Binary Code is empty! Generate binary code first.")
                 return {'CANCELLED'}
+            if props.binary_code.strip("01"):
+                self.report({'ERROR'}, "Binary Code must only contain 0 and 1! Translate a valid 12 or 13 digit sequence first.")
+                return {'CANCELLED'}
 
             # Get user-defined properties
             bit_width = props.bit_width
@@ -273,63 +597,58 @@ class AddMarkerOperator(bpy.types.Operator):
             thickness = props.thickness
             binary_code = props.binary_code
 
-            # Create materials
-            black_material = bpy.data.materials.new(name="Black_Material")
-            black_material.diffuse_color = (0, 0, 0, 1)  # Black color
-
-            white_material = bpy.data.materials.new(name="White_Material")
-            white_material.diffuse_color = (1, 1, 1, 1)  # White color
-
-            # Create collections for Binary 1 and Binary 0
-            binary_1_collection = bpy.data.collections.new("Binary_1_Group")
-            bpy.context.scene.collection.children.link(binary_1_collection)
-
-            binary_0_collection = bpy.data.collections.new("Binary_0_Group")
-            bpy.context.scene.collection.children.link(binary_0_collection)
-
-            # Start X position
-            current_x = 0
-
-            # Loop through the binary code
-            for i, bit in enumerate(binary_code):
-                # Create a new cube object for the bit (ensures precise dimensions)
-                bpy.ops.mesh.primitive_cube_add(
-                    location=(current_x + (bit_width / 2), 0, thickness / 2)  # Center at current_x
-                )
-                bit_object = bpy.context.object
-
-                # Set exact dimensions
-                bit_object.dimensions = (bit_width, height, thickness)
-
-                # Assign material and add to the correct collection
-                if bit == "1":
-                    bit_object.data.materials.append(black_material)  # Apply black material
-                    binary_1_collection.objects.link(bit_object)
-                else:
-                    bit_object.data.materials.append(white_material)  # Apply white material
-                    binary_0_collection.objects.link(bit_object)
-
-                # Remove the object from the default collection
-                bpy.context.scene.collection.objects.unlink(bit_object)
-
-                # Move to the next position
-                current_x += bit_width  # Increment X position by exact bit width
+            # Reuse the marker materials instead of creating new copies on every run
+            materials = ensure_materials()
+            black_material = materials["LumosX_Black"]
+            white_material = materials["LumosX_White"]
+
+            # Merge neighbouring bits of the same value into one bar each
+            bits = np.frombuffer(binary_code.encode(), dtype=np.uint8) == ord("1")
+            _, black_starts, black_widths = find_runs(bits[None, :])
+            _, white_starts, white_widths = find_runs(~bits[None, :])
+            bar_starts = np.concatenate([black_starts, white_starts])
+            bar_widths = np.concatenate([black_widths, white_widths])
+            bar_bits = np.concatenate([np.ones_like(black_starts), np.zeros_like(white_starts)])
+
+            # Bars are laid out along X and centered on Y
+            bar_count = len(bar_starts)
+            centers = np.zeros((bar_count, 3), dtype=np.float32)
+            centers[:, 0] = (bar_starts + bar_widths / 2) * bit_width
+            centers[:, 2] = thickness / 2
+            sizes = np.empty((bar_count, 3), dtype=np.float32)
+            sizes[:, 0] = bar_widths * bit_width
+            sizes[:, 1] = height
+            sizes[:, 2] = thickness
+
+            # Build the whole barcode as one mesh: material slot 0 is white, slot 1 is black
+            barcode_mesh = build_box_mesh("Barcode_Marker", centers, sizes, material_indices=bar_bits)
+            barcode_mesh.materials.append(white_material)
+            barcode_mesh.materials.append(black_material)
+
+            # Create a collection for the barcode, fill it, then add it to the scene
+            barcode_collection = bpy.data.collections.new("Barcode_Marker")
+            barcode_object = bpy.data.objects.new("Barcode_Marker", barcode_mesh)
+            barcode_collection.objects.link(barcode_object)
+            bpy.context.scene.collection.children.link(barcode_collection)
 
             # Final message
-            self.report({'INFO'}, f"Marker generated with {len(binary_code)} bits split into Binary 1 and Binary 0 groups.")
+            self.report({'INFO'}, f"Marker generated with {len(binary_code)} bits as a single mesh of {bar_count} bars.")
         
         elif props.marker_type == 'SPIRAL':
             # Create a circle mesh
-            bpy.ops.mesh.primitive_cylinder_add(
+            plate_mesh = build_cylinder_mesh(
+                "Spiral_Plate",
                 radius=props.diameter / 2,  # Diameter divided by 2 for the radius
                 depth=props.thickness,     # Thickness of the plate
-                location=(0, 0, props.thickness / 2),  # Center it above the origin
-                vertices=64                # Smooth circle approximation
+                segments=64                # Smooth circle approximation
             )
-            circle_plate = bpy.context.object
+            circle_plate = bpy.data.objects.new("Spiral_Plate", plate_mesh)
+            circle_plate.location = (0, 0, props.thickness / 2)  # Center it above the origin
 
-            # Rename for clarity
-            circle_plate.name = "Spiral_Plate"
+            # Add it to the active collection and make it the active object
+            context.collection.objects.link(circle_plate)
+            context.view_layer.objects.active = circle_plate
+            circle_plate.select_set(True)
 
             # Report success
             self.report({'INFO'}, f"Spiral Marker (Plate) Added with Diameter {props.diameter} and Thickness {props.thickness}!")
@@ -337,84 +656,56 @@ class AddMarkerOperator(bpy.types.Operator):
         
         elif props.marker_type == 'GRID':
             props = context.scene.lumosx_props
-            grid_state = eval(props.grid_state)
+            grid = GridStateManager.of(props)
+
+            # Validate input
+            if not grid.rows * grid.cols:
+                self.report({'ERROR'}, "Grid State is empty! Initialize the grid state first.")
+                return {'CANCELLED'}
+            grid_state = grid.get()
 
             # Get grid dimensions
             grid_width = props.grid_width
             grid_height = props.grid_height
             thickness = props.thickness
-            rows, cols = len(grid_state), len(grid_state[0])
+            rows, cols = grid_state.shape
 
             # Cell dimensions
             cell_width = grid_width / cols
             cell_height = grid_height / rows
 
-            # Create a new collection for the grid
-            grid_collection = bpy.data.collections.new("Grid_Marker")
-            bpy.context.scene.collection.children.link(grid_collection)
-
             # Start coordinates for the grid
             start_x = -grid_width / 2
             start_y = -grid_height / 2
 
-            # Keep track of already processed cells
-            processed_cells = set()
-
-            # Loop through the grid state to create objects
-            for r in range(rows):
-                for c in range(cols):
-                    if (r, c) in processed_cells:
-                        continue  # Skip cells already part of a merged group
-
-                    if grid_state[r][c] == 1:
-                        # Determine the dimensions of the merged cell group
-                        merge_width = cell_width
-                        merge_height = cell_height
-
-                        # Expand horizontally for merged cells
-                        for i in range(c + 1, cols):
-                            if grid_state[r][i] == 1:
-                                merge_width += cell_width
-                                processed_cells.add((r, i))
-                            else:
-                                break
-
-                        # Expand vertically for merged cells
-                        for j in range(r + 1, rows):
-                            if grid_state[j][c] == 1:
-                                merge_height += cell_height
-                                processed_cells.add((j, c))
-                            else:
-                                break
-
-                        # Calculate the center position of the merged cell
-                        # x_pos = start_x + (c * cell_width) + (merge_width / 2) - (cell_width / 2)
-                        # y_pos = start_y + (r * cell_height) + (merge_height / 2) - (cell_height / 2)
-                        x_pos = start_x + (c * cell_width) + (merge_width / 2) 
-                        y_pos = start_y + (r * cell_height) + (merge_height / 2)
-
-                        # Add the merged cell as a single object
-                        bpy.ops.mesh.primitive_cube_add(location=(x_pos, y_pos, thickness / 2))
-                        cell = bpy.context.object
-                        cell.dimensions = (merge_width, merge_height, thickness)
-                        grid_collection.objects.link(cell)
-                        bpy.context.scene.collection.objects.unlink(cell)
-
-                    else:
-                        # Add individual unmerged cells
-                        x_pos = start_x + (c * cell_width) + (cell_width / 2)
-                        y_pos = start_y + (r * cell_height) + (cell_height / 2)
-                        bpy.ops.mesh.primitive_cube_add(location=(x_pos, y_pos, thickness / 2))
-                        cell = bpy.context.object
-                        cell.dimensions = (cell_width, cell_height, thickness)
-                        grid_collection.objects.link(cell)
-                        bpy.context.scene.collection.objects.unlink(cell)
-
-                    # Mark the cell as processed
-                    processed_cells.add((r, c))
-            
-            self.report({'INFO'}, "Grid Marker Generated")
-        
+            # Group the cells into merged and unmerged blocks
+            block_rows, block_cols, block_widths, block_heights = merge_grid_blocks(grid_state)
+            block_count = len(block_rows)
+
+            # Compute the center and size of every block at once
+            centers = np.empty((block_count, 3), dtype=np.float32)
+            centers[:, 0] = start_x + (block_cols + block_widths / 2) * cell_width
+            centers[:, 1] = start_y + (block_rows + block_heights / 2) * cell_height
+            centers[:, 2] = thickness / 2
+            sizes = np.empty((block_count, 3), dtype=np.float32)
+            sizes[:, 0] = block_widths * cell_width
+            sizes[:, 1] = block_heights * cell_height
+            sizes[:, 2] = thickness
+
+            # Build the whole grid as one mesh
+            grid_mesh = build_box_mesh("Grid_Marker", centers, sizes)
+
+            # Create a collection for the grid, fill it, then add it to the scene
+            grid_collection = bpy.data.collections.new("Grid_Marker")
+            grid_object = bpy.data.objects.new("Grid_Marker", grid_mesh)
+            grid_collection.objects.link(grid_object)
+            bpy.context.scene.collection.children.link(grid_collection)
+
+            self.report({'INFO'}, f"Grid Marker Generated with {block_count} blocks")
+
+        # Evaluate the scene once, after the whole marker has been built
+        context.view_layer.update()
+
         return {'FINISHED'}
      
 
@@ -422,6 +713,7 @@ class AddMarkerOperator(bpy.types.Operator):
 class ToggleCellOperator(bpy.types.Operator):
     bl_idname = "object.toggle_cell_operator"
     bl_label = "Select/Deselect Cell"
+    bl_options = {'INTERNAL'}
 
     row: bpy.props.IntProperty()  # type: ignore
     col: bpy.props.IntProperty()  # type: ignore
@@ -429,19 +721,10 @@ class ToggleCellOperator(bpy.types.Operator):
     def execute(self, context):
         props = context.scene.lumosx_props
 
-        # Parse selected cells and grid state
-        selected_cells = eval(props.selected_cells)
-        grid_state = eval(props.grid_state)
-
-        # Toggle cell selection
-        cell_coords = (self.row, self.col)
-        if cell_coords in selected_cells:
-            selected_cells.remove(cell_coords)
-        else:
-            selected_cells.append(cell_coords)
-
-        # Save the updated state
-        props.selected_cells = str(selected_cells)
+        # Toggle cell selection; only the panel needs to know, so just redraw it
+        GridStateManager.of(props).toggle(self.row, self.col)
+        if context.area:
+            context.area.tag_redraw()
         self.report({'INFO'}, f"Cell [{self.row}, {self.col}] toggled")
         return {'FINISHED'}
 
@@ -449,6 +732,7 @@ class ToggleCellOperator(bpy.types.Operator):
 class InitializeGridStateOperator(bpy.types.Operator):
     bl_idname = "object.initialize_grid_state"
     bl_label = "Initialize Grid State"
+    bl_options = {'INTERNAL', 'UNDO'}
 
     def execute(self, context):
         props = context.scene.lumosx_props
@@ -460,64 +744,52 @@ class InitializeGridStateOperator(bpy.types.Operator):
 class MergeCellsOperator(bpy.types.Operator):
     bl_idname = "object.merge_cells"
     bl_label = "Merge Selected Cells"
+    bl_options = {'INTERNAL', 'UNDO'}
 
     def execute(self, context):
         props = context.scene.lumosx_props
-        selected_cells = eval(props.selected_cells)
-        grid_state = eval(props.grid_state)
+        grid = GridStateManager.of(props)
+        selected_mask = grid.selected_mask
+        cols = grid.cols
 
-        # Ensure at least two cells are selected
-        if len(selected_cells) < 2:
+        # Ensure at least two cells are selected (clearing the lowest bit leaves others set)
+        if not selected_mask & (selected_mask - 1):
             self.report({'WARNING'}, "Select at least two adjacent cells to merge")
             return {'CANCELLED'}
 
-        # Sort selected cells for consistency
-        selected_cells.sort()
-
-        # Extract unique rows and columns from selected cells
-        rows = set(r for r, _ in selected_cells)
-        cols = set(c for _, c in selected_cells)
-
-        if len(rows) == 1:
-            # Horizontal merge: all selected cells are in the same row
-            row = next(iter(rows))
-            col_indices = [c for _, c in selected_cells]
-            col_indices.sort()
-
-            # Ensure columns are contiguous
-            expected_range = list(range(min(col_indices), max(col_indices) + 1))
-            if col_indices != expected_range:
+        # Masks of the row and the column holding the first selected cell
+        first_index = (selected_mask & -selected_mask).bit_length() - 1
+        first_row, first_col = divmod(first_index, cols)
+        row_mask = ((1 << cols) - 1) << (first_row * cols)
+        column_mask = sum(1 << (r * cols + first_col) for r in range(grid.rows))
+
+        if selected_mask & row_mask == selected_mask:
+            # Horizontal merge: all selected cells are in the same row.
+            # Columns are contiguous when the shifted selection is a solid run of 1s
+            run = selected_mask >> first_index
+            if run & (run + 1):
+                col_indices = [c for _, c in mask_cells(selected_mask, cols)]
+                expected_range = list(range(col_indices[0], col_indices[-1] + 1))
                 self.report({'ERROR'}, f"Columns must be contiguous. Expected {expected_range}, got {col_indices}.")
                 return {'CANCELLED'}
 
-            # Mark only the selected cells as merged
-            for col in col_indices:
-                grid_state[row][col] = 1
-
-        elif len(cols) == 1:
+        elif selected_mask & column_mask == selected_mask:
             # Vertical merge: all selected cells are in the same column
-            col = next(iter(cols))
-            row_indices = [r for r, _ in selected_cells]
-            row_indices.sort()
+            row_indices = [r for r, _ in mask_cells(selected_mask, cols)]
 
             # Ensure rows are contiguous
-            expected_range = list(range(min(row_indices), max(row_indices) + 1))
+            expected_range = list(range(row_indices[0], row_indices[-1] + 1))
             if row_indices != expected_range:
                 self.report({'ERROR'}, f"Rows must be contiguous. Expected {expected_range}, got {row_indices}.")
                 return {'CANCELLED'}
 
-            # Mark only the selected cells as merged
-            for row in row_indices:
-                grid_state[row][col] = 1
-
         else:
             # Mixed selection (not in the same row or column)
             self.report({'ERROR'}, "Cells must be in the same row or column to merge")
             return {'CANCELLED'}
 
-        # Save updated grid state and clear selected cells
-        props.grid_state = str(grid_state)
-        props.selected_cells = "[]"
+        # Mark only the selected cells as merged and clear the selection
+        grid.merge()
 
         self.report({'INFO'}, "Cells merged successfully")
         return {'FINISHED'}
@@ -527,24 +799,19 @@ class MergeCellsOperator(bpy.types.Operator):
 class SplitCellsOperator(bpy.types.Operator):
     bl_idname = "object.split_cells"
     bl_label = "Split Merged Cells"
+    bl_options = {'INTERNAL', 'UNDO'}
 
     def execute(self, context):
         props = context.scene.lumosx_props
-        selected_cells = eval(props.selected_cells)
-        grid_state = eval(props.grid_state)
+        grid = GridStateManager.of(props)
 
         # Ensure at least one cell is selected
-        if not selected_cells:
+        if not grid.selected_mask:
             self.report({'WARNING'}, "Select cells to split")
             return {'CANCELLED'}
 
-        # Unmark selected cells as merged (set to 0)
-        for r, c in selected_cells:
-            grid_state[r][c] = 0
-
-        # Save the updated grid state and clear selected cells
-        props.grid_state = str(grid_state)
-        props.selected_cells = "[]"
+        # Unmark selected cells as merged and clear the selection
+        grid.split()
         self.report({'INFO'}, "Cells split successfully")
         return {'FINISHED'}
 
@@ -557,6 +824,11 @@ class LumosXPanel(bpy.types.Panel):
     bl_region_type = 'UI'
     bl_category = 'LumosX Tools'
 
+    @staticmethod
+    def update_binary_code(props, context):
+        """Re-encode the binary code whenever the encoded sequence changes, or clear it while the sequence is incomplete."""
+        props.binary_code = encode_ean13(props.encoded_sequence) if is_ean13_sequence(props.encoded_sequence) else ""
+
     def draw(self, context):
         layout = self.layout
         props = context.scene.lumosx_props
@@ -599,27 +871,28 @@ class LumosXPanel(bpy.types.Panel):
             # Add a button to initialize grid state
             layout.operator("object.initialize_grid_state", text="Initialize Grid State")
 
-            # Initialize grid state if empty
-            current_grid = eval(props.grid_state) if props.grid_state else []
-            if len(current_grid) != props.number_of_rows or len(current_grid[0]) != props.number_of_columns:
-                initialize_grid_state(props)
+            # The grid state is (re)initialized on load and on resize, never while drawing
+            grid = GridStateManager.of(props)
+            if not grid.rows * grid.cols:
+                layout.label(text="Initialize the grid state to edit cells")
 
             # Display the grid preview
             layout.label(text="Grid Preview:")
-            grid_state = eval(props.grid_state)
-            selected_cells = eval(props.selected_cells)
-            for r, row in enumerate(grid_state):
-                row_layout = layout.row(align=True)
-                for c, cell in enumerate(row):
-                    is_selected = (r, c) in selected_cells
-                    button_text = "M" if cell == 1 else ("S" if is_selected else "")
-                    button_color = (1.0, 1.0, 0.0, 1.0) if is_selected else (1.0, 1.0, 1.0, 1.0)  # Highlight selected cells
-                    op = row_layout.operator(
-                        "object.toggle_cell_operator",
-                        text=button_text,
-                        emboss=True
-                    )
-                    op.row, op.col = r, c
+            grid_mask, selected_mask, cols = grid.grid_mask, grid.selected_mask, grid.cols
+
+            # Precompute every cell's state: bit 1 is merged ("M"), bit 0 is selected ("S")
+            cell_states = [((grid_mask >> i) & 1) << 1 | ((selected_mask >> i) & 1) for i in range(grid.rows * cols)]
+
+            # Lay out all cells in a single grid flow instead of one row container per grid row
+            grid_layout = layout.grid_flow(row_major=True, columns=cols, even_columns=True, even_rows=True, align=True)
+            for i, state in enumerate(cell_states):
+                op = grid_layout.operator(
+                    "object.toggle_cell_operator",
+                    text=("", "S", "M", "M")[state],
+                    emboss=True,
+                    depress=bool(state & 1)  # Highlight selected cells
+                )
+                op.row, op.col = divmod(i, cols)
 
             # Merge and Split buttons
             layout.operator("object.merge_cells", text="Merge")
@@ -647,7 +920,37 @@ def register():
         bpy.utils.register_class(cls)
     bpy.types.Scene.lumosx_props = bpy.props.PointerProperty(type=LumosXProperties)
 
+    # Create the marker materials up front, for the current file and every file loaded later
+    bpy.app.handlers.load_post.append(ensure_materials_on_load)
+    try:
+        ensure_materials()
+    except AttributeError:
+        pass  # bpy.data is restricted while add-ons load at startup; load_post covers that case
+
+    # Upgrade or create grid states when a file is opened, serialize them when it is saved,
+    # and re-read them when undo or redo restores the stored properties
+    bpy.app.handlers.load_post.append(prepare_grid_states_on_load)
+    bpy.app.handlers.save_pre.append(save_grid_states_on_save)
+    bpy.app.handlers.undo_post.append(reload_grid_states_on_undo)
+    bpy.app.handlers.redo_post.append(reload_grid_states_on_undo)
+
+    # Also upgrade the file that is already open when the add-on is enabled or reloaded
+    try:
+        prepare_grid_states_on_load(None)
+    except AttributeError:
+        pass  # bpy.data is restricted while add-ons load at startup; load_post covers that case
+
 def unregister():
+    for handlers, handler in (
+        (bpy.app.handlers.load_post, ensure_materials_on_load),
+        (bpy.app.handlers.load_post, prepare_grid_states_on_load),
+        (bpy.app.handlers.save_pre, save_grid_states_on_save),
+        (bpy.app.handlers.undo_post, reload_grid_states_on_undo),
+        (bpy.app.handlers.redo_post, reload_grid_states_on_undo),
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
+    GridStateManager.clear()
     for cls in classes:
         bpy.utils.unregister_class(cls)
     del bpy.types.Scene.lumosx_props